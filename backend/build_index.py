@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from index_artifact import (
+    ARTIFACT_FILES, CURRENT_POINTER, FORMAT_VERSION, MANIFEST_NAME,
+    build_postings, file_sha256, qgrams, soundex,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_DEFINITIONS = 3  # Same limit get_word_meaning uses at runtime
+
+# Worker: look up WordNet definitions for a chunk of lemma names
+def define_chunk(names: List[str]) -> List[Tuple[str, str]]:
+    """Combine the first few synset definitions exactly like get_word_meaning"""
+    from nltk.corpus import wordnet as wn
+    results = []
+    for name in names:
+        definitions = []
+        for synset in wn.synsets(name)[:MAX_DEFINITIONS]:
+            definition = synset.definition()
+            if definition and definition not in definitions:
+                definitions.append(definition)
+        if definitions:
+            results.append((name, "; ".join(definitions)))
+    return results
+
+def read_wordnet_lemmas() -> Tuple[List[str], List[str]]:
+    """Split WordNet lemma names into single words and multi-word collocations"""
+    from nltk.corpus import wordnet as wn
+    words, collocations = set(), set()
+    for name in wn.all_lemma_names():
+        name = name.lower()
+        if '_' in name:
+            collocations.add(name)
+            # Collocation parts must be reachable by token correction
+            words.update(t for t in name.split('_') if t.isalpha())
+        elif name.isalpha():
+            words.add(name)
+    return sorted(words), sorted(collocations)
+
+def read_word_list(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+def build_prefix_ranges(lexicon: List[str]) -> Tuple[List[str], np.ndarray]:
+    """(start, end) lexicon id ranges for every two-letter prefix of the sorted lexicon"""
+    keys, ranges = [], []
+    for word_id, word in enumerate(lexicon):
+        if len(word) < 2:
+            continue
+        prefix = word[:2]
+        if keys and keys[-1] == prefix:
+            ranges[-1][1] = word_id + 1
+        else:
+            keys.append(prefix)
+            ranges.append([word_id, word_id + 1])
+    return keys, np.array(ranges, dtype=np.int32).reshape(-1, 2)
+
+def write_lines(path: str, lines: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+def write_artifact(output: str, lexicon: List[str], collocations: List[str],
+                   definitions: Dict[str, str], frequency: Dict[str, int], sources: Dict,
+                   version: Optional[str] = None, activate: bool = True) -> str:
+    """Write one artifact version under output and return its directory.
+
+    `lexicon` must be sorted; ids in every index are positions in it.
+    """
+    version = version or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    final_dir = os.path.join(output, version)
+    if os.path.exists(final_dir):
+        raise SystemExit(f"Index version {version} already exists in {output}")
+    # Build into a scratch directory so a crash never leaves a half-written version
+    work_dir = final_dir + ".tmp"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    write_lines(os.path.join(work_dir, "lexicon.txt"), lexicon)
+    write_lines(os.path.join(work_dir, "collocations.txt"), collocations)
+
+    definition_keys = sorted(definitions)
+    offsets = np.zeros(len(definition_keys) + 1, dtype=np.int64)
+    with open(os.path.join(work_dir, "definitions.txt"), "wb") as f:
+        for i, key in enumerate(definition_keys):
+            encoded = definitions[key].encode("utf-8")
+            f.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+    write_lines(os.path.join(work_dir, "definition_keys.txt"), definition_keys)
+    np.save(os.path.join(work_dir, "definition_offsets.npy"), offsets)
+
+    for kind, key_func in (("qgram", lambda w: set(qgrams(w))), ("phonetic", lambda w: [soundex(w)])):
+        keys, key_offsets, ids = build_postings(lexicon, key_func)
+        write_lines(os.path.join(work_dir, f"{kind}_keys.txt"), keys)
+        np.save(os.path.join(work_dir, f"{kind}_offsets.npy"), key_offsets)
+        np.save(os.path.join(work_dir, f"{kind}_postings.npy"), ids)
+
+    prefix_keys, prefix_ranges = build_prefix_ranges(lexicon)
+    write_lines(os.path.join(work_dir, "prefix_keys.txt"), prefix_keys)
+    np.save(os.path.join(work_dir, "prefix_ranges.npy"), prefix_ranges)
+
+    with open(os.path.join(work_dir, "frequency.json"), "w") as f:
+        json.dump(frequency, f)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "created": datetime.utcnow().isoformat(),
+        "sources": sources,
+        "counts": {
+            "lexicon": len(lexicon),
+            "collocations": len(collocations),
+            "definitions": len(definition_keys),
+        },
+        "files": {
+            name: {
+                "sha256": file_sha256(os.path.join(work_dir, name)),
+                "bytes": os.path.getsize(os.path.join(work_dir, name)),
+            }
+            for name in ARTIFACT_FILES
+        },
+    }
+    with open(os.path.join(work_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.rename(work_dir, final_dir)
+    if activate:
+        # Swap the CURRENT pointer atomically so a running server never sees a partial write
+        pointer_tmp = os.path.join(output, CURRENT_POINTER + ".tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(output, CURRENT_POINTER))
+
+    return final_dir
+
+def build(args) -> str:
+    start = time.time()
+    print("Reading WordNet lemmas...")
+    lexicon, collocations = read_wordnet_lemmas()
+
+    # dictionary.json and custom lists extend the lexicon and seed frequencies
+    with open(args.dictionary) as f:
+        dictionary_entries = json.load(f)
+    extra_words = [w.lower() for w in dictionary_entries]
+    for path in args.words:
+        extra_words.extend(read_word_list(path))
+    lexicon = sorted(set(lexicon).union(w for w in extra_words if w.isalpha()))
+    frequency = {word: 1 for word in extra_words}
+
+    # Definition lookups dominate build time, so spread them across cores
+    names = lexicon + collocations
+    chunk_size = max(1, len(names) // (args.jobs * 8))
+    chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+    print(f"Looking up definitions for {len(names)} entries on {args.jobs} processes...")
+    definitions: Dict[str, str] = {}
+    # Spawn, not fork: the parent already has WordNet's data files open and forked
+    # workers sharing those file handles read garbage synsets
+    with get_context("spawn").Pool(args.jobs) as pool:
+        for results in pool.imap_unordered(define_chunk, chunks):
+            definitions.update(results)
+    # dictionary.json only fills words WordNet doesn't define, matching runtime preference
+    for word, meaning in dictionary_entries.items():
+        definitions.setdefault(word.lower(), meaning)
+
+    from nltk.corpus import wordnet as wn
+    sources = {
+        "wordnet": wn.get_version(),
+        "dictionary": os.path.basename(args.dictionary),
+        "word_lists": [os.path.basename(p) for p in args.words],
+    }
+    print("Writing lexicon, definitions and indexes...")
+    final_dir = write_artifact(args.output, lexicon, collocations, definitions, frequency,
+                               sources, version=args.version, activate=not args.no_activate)
+
+    print(f"Built index {os.path.basename(final_dir)} in {time.time() - start:.1f}s: "
+          f"{len(lexicon)} words, {len(collocations)} collocations, {len(definitions)} definitions")
+    return final_dir
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the versioned search index artifact")
+    parser.add_argument("--output", default=os.getenv("INDEX_DIR", os.path.join(BACKEND_DIR, "index")),
+                        help="Index root directory (default: INDEX_DIR or backend/index)")
+    parser.add_argument("--dictionary", default=os.path.join(BACKEND_DIR, "dictionary.json"),
+                        help="JSON word -> definition file to include")
+    parser.add_argument("--words", nargs="*", default=[],
+                        help="Extra word list files, one word per line")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Processes used for definition lookups")
+    parser.add_argument("--version", help="Version name (default: UTC timestamp)")
+    parser.add_argument("--no-activate", action="store_true",
+                        help="Build without pointing CURRENT at the new version")
+    args = parser.parse_args()
+
+    try:
+        build(args)
+    except LookupError:
+        print("WordNet data not found. Run 'python download_nltk_data.py' first.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""On-disk format of the prebuilt search index shared by build_index.py and main.py.
+
+An artifact is one versioned directory holding the lexicon, definition store,
+q-gram/prefix/phonetic indexes and a manifest.json with a SHA-256 checksum for
+every file. Text files are newline-joined UTF-8; offset and posting arrays are
+.npy files so the server can memory-map them instead of rebuilding anything.
+"""
+import hashlib
+import json
+import mmap
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_POINTER = "CURRENT"  # File in the index root naming the active version
+
+# Files every artifact must contain, in the order they are written
+ARTIFACT_FILES = [
+    "lexicon.txt",              # Sorted single words; ids are line numbers
+    "collocations.txt",         # WordNet multi-word lemmas, e.g. hot_dog
+    "definition_keys.txt",      # Sorted words and collocations with a definition
+    "definitions.txt",          # Definitions concatenated in key order
+    "definition_offsets.npy",   # int64 byte offsets into definitions.txt, len(keys) + 1
+    "qgram_keys.txt",           # Padded bigrams such as ^c, co, r$
+    "qgram_offsets.npy",        # int64 offsets into qgram_postings.npy
+    "qgram_postings.npy",       # int32 lexicon ids per bigram
+    "prefix_keys.txt",          # Two-letter prefixes
+    "prefix_ranges.npy",        # int32 (start, end) lexicon id range per prefix
+    "phonetic_keys.txt",        # Soundex codes
+    "phonetic_offsets.npy",     # int64 offsets into phonetic_postings.npy
+    "phonetic_postings.npy",    # int32 lexicon ids per Soundex code
+    "frequency.json",           # Frequency seeds for WORD_FREQUENCY
+]
+
+
+class ArtifactError(Exception):
+    """Raised when an index artifact is missing files or fails verification"""
+
+
+# Simple Soundex code used by the phonetic index and scoring tier
+def soundex(word: str) -> str:
+    """Return the 4-character Soundex code of a word"""
+    codes = {
+        **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+        **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+    }
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    result = letters[0].upper()
+    previous = codes.get(letters[0], '')
+    for c in letters[1:]:
+        code = codes.get(c, '')
+        if code and code != previous:
+            result += code
+        if c not in 'hw':
+            previous = code
+    return (result + '000')[:4]
+
+def qgrams(word: str) -> List[str]:
+    """Padded bigrams of a word: "cat" -> ["^c", "ca", "at", "t$"]"""
+    padded = f"^{word}$"
+    return [padded[i:i+2] for i in range(len(padded) - 1)]
+
+def build_postings(lexicon: List[str], key_func) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """CSR-style inverted index: sorted keys, offsets and concatenated lexicon ids"""
+    postings = defaultdict(list)
+    for word_id, word in enumerate(lexicon):
+        for key in key_func(word):
+            postings[key].append(word_id)
+    keys = sorted(postings)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    for i, key in enumerate(keys):
+        offsets[i + 1] = offsets[i] + len(postings[key])
+    ids = np.fromiter((word_id for key in keys for word_id in postings[key]),
+                      dtype=np.int32, count=int(offsets[-1]))
+    return keys, offsets, ids
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Reading
+
+def _read_lines(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return text.split("\n") if text else []
+
+def _map_file(path: str) -> Optional[mmap.mmap]:
+    """Read-only mmap of a file; empty files can't be mapped so they return None"""
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def verify_artifact(path: str) -> Dict:
+    """Check the manifest and every file checksum; return the manifest"""
+    try:
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Unreadable manifest in {path}: {e}")
+
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported index format {manifest.get('format_version')} in {path}")
+
+    for name in ARTIFACT_FILES:
+        expected = manifest.get("files", {}).get(name)
+        file_path = os.path.join(path, name)
+        if expected is None or not os.path.exists(file_path):
+            raise ArtifactError(f"Index file {name} is missing from {path}")
+        if os.path.getsize(file_path) != expected["bytes"] or file_sha256(file_path) != expected["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {name} in {path}")
+    return manifest
+
+def load_artifact(path: str) -> Dict:
+    """Verify an artifact directory and memory-map its arrays and definition store"""
+    manifest = verify_artifact(path)
+
+    def array(name):
+        return np.load(os.path.join(path, name), mmap_mode="r")
+
+    qgram_keys = _read_lines(os.path.join(path, "qgram_keys.txt"))
+    prefix_keys = _read_lines(os.path.join(path, "prefix_keys.txt"))
+    phonetic_keys = _read_lines(os.path.join(path, "phonetic_keys.txt"))
+    with open(os.path.join(path, "frequency.json")) as f:
+        frequency = json.load(f)
+
+    return {
+        "path": path,
+        "manifest": manifest,
+        "lexicon": _read_lines(os.path.join(path, "lexicon.txt")),
+        "collocations": _read_lines(os.path.join(path, "collocations.txt")),
+        "definition_keys": _read_lines(os.path.join(path, "definition_keys.txt")),
+        "definitions": _map_file(os.path.join(path, "definitions.txt")),
+        "definition_offsets": array("definition_offsets.npy"),
+        "qgram_ids": {key: i for i, key in enumerate(qgram_keys)},
+        "qgram_offsets": array("qgram_offsets.npy"),
+        "qgram_postings": array("qgram_postings.npy"),
+        "prefix_ids": {key: i for i, key in enumerate(prefix_keys)},
+        "prefix_ranges": array("prefix_ranges.npy"),
+        "phonetic_ids": {key: i for i, key in enumerate(phonetic_keys)},
+        "phonetic_offsets": array("phonetic_offsets.npy"),
+        "phonetic_postings": array("phonetic_postings.npy"),
+        "frequency": frequency,
+    }
+
+def load_current_artifact(index_dir: str) -> Optional[Dict]:
+    """Load the version named by index_dir/CURRENT, or None if no index was built"""
+    pointer = os.path.join(index_dir, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        version = f.read().strip()
+    return load_artifact(os.path.join(index_dir, version))
+
+# Lookups
+
+def lookup_definition(artifact: Dict, word: str) -> Optional[str]:
+    """Binary-search the definition store; only the matching slice is decoded"""
+    keys = artifact["definition_keys"]
+    i = bisect_left(keys, word)
+    if i == len(keys) or keys[i] != word:
+        return None
+    offsets = artifact["definition_offsets"]
+    return artifact["definitions"][int(offsets[i]):int(offsets[i + 1])].decode("utf-8")
+
+def prefix_candidates(artifact: Dict, prefix: str, limit: int = 50) -> List[str]:
+    """Lexicon words starting with prefix, using the two-letter range table"""
+    if len(prefix) < 2 or prefix[:2] not in artifact["prefix_ids"]:
+        return []
+    start, end = artifact["prefix_ranges"][artifact["prefix_ids"][prefix[:2]]]
+    lexicon = artifact["lexicon"]
+    start = bisect_left(lexicon, prefix, int(start), int(end))
+    results = []
+    for i in range(start, int(end)):
+        if not lexicon[i].startswith(prefix) or len(results) >= limit:
+            break
+        results.append(lexicon[i])
+    return results
+
+def _postings(artifact: Dict, kind: str, key_id: int) -> np.ndarray:
+    offsets = artifact[f"{kind}_offsets"]
+    return artifact[f"{kind}_postings"][int(offsets[key_id]):int(offsets[key_id + 1])]
+
+def qgram_candidates(artifact: Dict, word: str, limit: int = 200) -> List[str]:
+    """Lexicon words sharing the most bigrams with word"""
+    lists = [_postings(artifact, "qgram", artifact["qgram_ids"][gram])
+             for gram in set(qgrams(word)) if gram in artifact["qgram_ids"]]
+    if not lists:
+        return []
+    ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+    if len(ids) > limit:
+        top = np.argpartition(counts, -limit)[-limit:]
+        ids = ids[top]
+    lexicon = artifact["lexicon"]
+    return [lexicon[i] for i in ids.tolist()]
+
+def phonetic_candidates(artifact: Dict, word: str, limit: int = 50) -> List[str]:
+    """Lexicon words with the same Soundex code as word"""
+    code = soundex(word)
+    if code not in artifact["phonetic_ids"]:
+        return []
+    lexicon = artifact["lexicon"]
+    return [lexicon[i] for i in _postings(artifact, "phonetic", artifact["phonetic_ids"][code])[:limit].tolist()]
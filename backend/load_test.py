@@ -0,0 +1,345 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import string
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MIX = "exact=0.4,typo=0.3,garbage=0.1,autocomplete=0.2"
+
+# Pick a free local port for the uvicorn instance under test
+def find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Start a local uvicorn server with the requested number of workers
+def start_server(port: int, workers: int, keep_rate_limits: bool = False) -> subprocess.Popen:
+    """Launch main:app and wait until it accepts connections"""
+    env = dict(os.environ)
+    if not keep_rate_limits:
+        # The harness replays everything as one user, so lift the per-user limits
+        env.update({
+            "RATE_EXACT_PER_SEC": "1000000", "RATE_EXACT_BURST": "1000000",
+            "RATE_FUZZY_PER_SEC": "1000000", "RATE_FUZZY_BURST": "1000000",
+            "MAX_QUEUED_PER_USER": "1000000",
+        })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.time() + 120  # WordNet loading can take a while
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/validate-session")
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("Server did not start in time")
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+# Sum user+system CPU seconds of a process and its direct children (Linux only)
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """Read CPU time from /proc; returns None where /proc is unavailable"""
+    ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    total = 0
+    found = False
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after the closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        ppid = int(fields[1])
+        if int(entry) == pid or ppid == pid:
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+            found = True
+    return total / ticks if found else None
+
+# Log in once via /token and return the bearer token
+def login(host: str, port: int, username: str, password: str) -> str:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    body = urlencode({"username": username, "password": password})
+    conn.request("POST", "/token", body=body,
+                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"Login failed with status code: {response.status}")
+    return json.loads(data)["access_token"]
+
+# Load the words used to generate the query mix
+def load_words(index_dir: str) -> List[str]:
+    """Lexicon of the prebuilt index, else WordNet's lemmas, else dictionary.json.
+
+    A large lexicon keeps exact queries from all turning into cache hits after
+    warm-up and spreads typos over many different words.
+    """
+    from index_artifact import ArtifactError, load_current_artifact
+    try:
+        artifact = load_current_artifact(index_dir)
+        if artifact:
+            return [w for w in artifact["lexicon"] if w.isalpha()]
+    except ArtifactError as e:
+        print(f"Ignoring prebuilt index: {e}")
+    try:
+        from nltk.corpus import wordnet as wn
+        return sorted({w.lower() for w in wn.all_lemma_names() if w.isalpha()})
+    except LookupError:
+        print("WordNet data not found; drawing queries from dictionary.json only")
+    with open(os.path.join(BACKEND_DIR, "dictionary.json")) as f:
+        return [w for w in json.load(f).keys() if w.isalpha()]
+
+def make_typo(word: str, rng: random.Random) -> str:
+    """Apply one random deletion, swap or substitution"""
+    if len(word) < 3:
+        return word + rng.choice(string.ascii_lowercase)
+    i = rng.randrange(len(word) - 1)
+    kind = rng.choice(("delete", "swap", "substitute"))
+    if kind == "delete":
+        return word[:i] + word[i+1:]
+    if kind == "swap":
+        return word[:i] + word[i+1] + word[i] + word[i+2:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i+1:]
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """Parse "exact=0.4,typo=0.3,..." into normalized (kind, weight) pairs"""
+    mix = []
+    for part in spec.split(","):
+        kind, weight = part.split("=")
+        kind = kind.strip()
+        if kind not in ("exact", "typo", "garbage", "autocomplete"):
+            raise ValueError(f"Unknown query kind: {kind}")
+        mix.append((kind, float(weight)))
+    total = sum(weight for _, weight in mix)
+    return [(kind, weight / total) for kind, weight in mix]
+
+def generate_queries(words: List[str], mix: List[Tuple[str, float]], count: int,
+                     seed: int) -> List[Tuple[str, Optional[str]]]:
+    """Build a reproducible list of (query, scoring profile) pairs following the mix"""
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in mix]
+    weights = [weight for _, weight in mix]
+    queries = []
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        word = rng.choice(words)
+        if kind == "exact":
+            queries.append((word, None))
+        elif kind == "typo":
+            queries.append((make_typo(word, rng), None))
+        elif kind == "garbage":
+            queries.append(("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))), None))
+        else:
+            # Autocomplete misses fall back to /search with a short prefix, as the frontend does
+            queries.append((word[:rng.randint(2, max(2, min(4, len(word))))], "fast"))
+    return queries
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+# Replay queries at a fixed open-loop arrival rate
+def run_step(host: str, port: int, token: str, queries: List[Tuple[str, Optional[str]]],
+             rate: float, duration: float, concurrency: int, seed: int, offset: int = 0) -> Dict:
+    """Send Poisson arrivals for `duration` seconds; latency is measured from the
+    scheduled send time so a slow server cannot hold back the offered load.
+
+    Queries are taken from `offset` on, so successive steps don't replay
+    queries an earlier step already cached.
+    """
+    local = threading.local()
+    latencies = []
+    errors = [0]
+    rejected = [0]  # 429 responses from the per-user rate limiter
+    lock = threading.Lock()
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+
+    def send(query: Tuple[str, Optional[str]], scheduled: float):
+        word, profile = query
+        body = {"word": word}
+        if profile:
+            body["profile"] = profile
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            conn.request("POST", "/search", body=json.dumps(body), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            status = None
+        elapsed = time.perf_counter() - scheduled
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            elif status == 429:
+                rejected[0] += 1
+            else:
+                errors[0] += 1
+
+    rng = random.Random(seed)
+    sent = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        next_send = start
+        while next_send - start < duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, queries[(offset + sent) % len(queries)], next_send)
+            sent += 1
+            next_send += rng.expovariate(rate)
+    wall = time.perf_counter() - start
+
+    return {
+        "offered_qps": rate,
+        "achieved_qps": len(latencies) / wall if wall else 0.0,
+        "sent": sent,
+        "errors": errors[0],
+        "rejected": rejected[0],
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+# Sweep arrival rates for one worker count
+def measure_workers(args, workers: int, queries: List[str]) -> Dict:
+    port = args.port or find_free_port()
+    proc = None if args.url_port else start_server(port, workers, args.keep_rate_limits)
+    if args.url_port:
+        port = args.url_port
+    try:
+        token = login("127.0.0.1", port, args.username, args.password)
+        # Warm up caches so the first step does not pay for cold lookups
+        warmup = run_step("127.0.0.1", port, token, queries, args.rates[0], 2, args.concurrency, args.seed)
+        offset = warmup["sent"]
+
+        steps = []
+        saturation = None
+        breached = False
+        for rate in args.rates:
+            cpu_before = process_cpu_seconds(proc.pid) if proc else None
+            step = run_step("127.0.0.1", port, token, queries, rate,
+                            args.duration, args.concurrency, args.seed, offset)
+            offset += step["sent"]
+            cpu_after = process_cpu_seconds(proc.pid) if proc else None
+            if cpu_before is not None and cpu_after is not None and step["sent"]:
+                step["cpu_ms_per_request"] = (cpu_after - cpu_before) * 1000 / step["sent"]
+            else:
+                step["cpu_ms_per_request"] = None
+            steps.append(step)
+            print(format_step(workers, step))
+
+            healthy = (step["p99_ms"] <= args.slo_ms
+                       and step["errors"] == 0
+                       and step["rejected"] == 0
+                       and step["achieved_qps"] >= 0.95 * rate)
+            # Saturation is the last healthy rate before the first breach; later healthy
+            # steps are noise and must not push it above a failing rate
+            if healthy and not breached:
+                saturation = rate
+            elif not healthy:
+                breached = True
+                if args.stop_on_breach:
+                    break
+        return {"workers": workers, "saturation_qps": saturation, "steps": steps}
+    finally:
+        if proc:
+            stop_server(proc)
+
+def format_step(workers: int, step: Dict) -> str:
+    cpu = step["cpu_ms_per_request"]
+    cpu_str = f"{cpu:8.2f}" if cpu is not None else "     n/a"
+    return (f"{workers:>7} | {step['offered_qps']:>8.1f} | {step['achieved_qps']:>8.1f} | "
+            f"{step['p50_ms']:>8.1f} | {step['p95_ms']:>8.1f} | {step['p99_ms']:>8.1f} | "
+            f"{step['errors']:>6} | {step['rejected']:>8} | {cpu_str}")
+
+def print_report(results: List[Dict], slo_ms: float):
+    print("\n=== CAPACITY REPORT ===")
+    print(f"SLO: p99 <= {slo_ms:.0f} ms, no errors or rejections, >= 95% of offered load served\n")
+    for result in results:
+        saturation = result["saturation_qps"]
+        saturation_str = f"{saturation:.1f} QPS" if saturation is not None else "below lowest rate"
+        print(f"Workers: {result['workers']:<3} saturation point: {saturation_str}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test for the /search endpoint")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="Worker counts to measure, one server per count")
+    parser.add_argument("--rates", type=float, nargs="+", default=[10, 25, 50, 100, 200, 400],
+                        help="Offered arrival rates in requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per rate step")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Query mix, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--slo-ms", type=float, default=100, help="p99 latency SLO in milliseconds")
+    parser.add_argument("--concurrency", type=int, default=256, help="Maximum in-flight requests")
+    parser.add_argument("--port", type=int, default=0, help="Port for spawned servers (default: random)")
+    parser.add_argument("--url-port", type=int, default=0,
+                        help="Test an already running local server on this port instead of spawning one")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--queries", type=int, default=50000,
+                        help="Distinct queries generated before cycling")
+    parser.add_argument("--index-dir", default=os.getenv("INDEX_DIR", os.path.join(BACKEND_DIR, "index")),
+                        help="Prebuilt index whose lexicon supplies query words")
+    parser.add_argument("--keep-rate-limits", action="store_true",
+                        help="Keep the server's per-user rate limits instead of lifting them")
+    parser.add_argument("--stop-on-breach", action="store_true",
+                        help="Stop a sweep at the first rate that breaks the SLO")
+    parser.add_argument("--output", help="Write the capacity report as JSON to this file")
+    args = parser.parse_args()
+    args.rates.sort()
+
+    queries = generate_queries(load_words(args.index_dir), parse_mix(args.mix), args.queries, args.seed)
+
+    print(f"{'WORKERS':>7} | {'OFFERED':>8} | {'ACHIEVED':>8} | {'P50 MS':>8} | "
+          f"{'P95 MS':>8} | {'P99 MS':>8} | {'ERRORS':>6} | {'REJECTED':>8} | {'CPU MS/REQ':>8}")
+    print("-" * 99)
+    results = [measure_workers(args, workers, queries) for workers in args.workers]
+    print_report(results, args.slo_ms)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"slo_ms": args.slo_ms, "mix": args.mix, "results": results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,14 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Response, Cookie, Request
+from fastapi import FastAPI, HTTPException, Depends, status, Response, Cookie, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 import json
 from rapidfuzz import process, fuzz
+from rapidfuzz.distance import DamerauLevenshtein
 import bcrypt
 import nltk
 from nltk.corpus import wordnet as wn
@@ -15,6 +16,19 @@ from nltk.stem import WordNetLemmatizer
 import re
 import string
 import os
+import math
+import asyncio
+from collections import deque, Counter
+import time
+import numpy as np
+from search_history import (
+    get_user_history, record_search, clear_history,
+    load_search_history, flush_search_history, flush_history_periodically,
+)
+from index_artifact import (
+    ArtifactError, load_current_artifact, lookup_definition,
+    prefix_candidates, qgram_candidates, phonetic_candidates, soundex, qgrams, build_postings,
+)
 
 # Try to load environment variables from .env file
 try:
@@ -45,6 +59,18 @@ except LookupError:
     # Continue with empty dictionary as fallback
     pass
 
+# Load the prebuilt index artifact (see build_index.py), verifying its checksums
+INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index"))
+try:
+    INDEX_ARTIFACT = load_current_artifact(INDEX_DIR)
+    if INDEX_ARTIFACT:
+        print(f"Loaded index {INDEX_ARTIFACT['manifest']['version']} from {INDEX_DIR}")
+    else:
+        print("No prebuilt index found. Run 'python build_index.py' to avoid runtime index builds.")
+except ArtifactError as e:
+    print(f"Ignoring invalid index artifact: {e}")
+    INDEX_ARTIFACT = None
+
 # Initialize WordNet lemmatizer
 lemmatizer = WordNetLemmatizer()
 
@@ -53,6 +79,16 @@ DICTIONARY_WORDS = set()
 DICTIONARY_CACHE = {}
 WORD_FREQUENCY = {}  # Store word frequency for better suggestions
 
+# Phrase search indexes, built once at startup by build_phrase_index()
+LEXICON_WORDS: List[str] = []  # Sorted single-word lexicon for batched token correction
+LEXICON_LENGTHS = np.zeros(0, dtype=np.int32)  # len() of every LEXICON_WORDS entry
+PHRASE_QGRAMS: Dict[str, np.ndarray] = {}  # Padded bigram -> LEXICON_WORDS ids
+COLLOCATIONS: Dict[Tuple[str, ...], str] = {}  # ("hot", "dog") -> "hot_dog"
+COLLOCATION_PREFIXES = set()  # Every proper token prefix of a collocation, e.g. ("hot",)
+PHRASE_MAX_TOKENS = int(os.getenv("PHRASE_MAX_TOKENS", "4"))
+PHRASE_CANDIDATES_PER_TOKEN = 20  # Corrections kept per token when walking collocations
+PHRASE_NEIGHBOURHOOD_LIMIT = 2000  # Lexicon words scored per token
+
 # Function to normalize words for better matching
 def normalize_word(word: str) -> str:
     """Clean and normalize a word for better matching"""
@@ -68,23 +104,39 @@ def normalize_word(word: str) -> str:
     return word
 
 # Enhanced function to get word meaning with fallbacks
-def get_word_meaning(word: str) -> Optional[str]:
-    """Get word definition with improved matching"""
+def get_word_meaning(word: str, count_lookup: bool = True) -> Optional[str]:
+    """Get word definition with improved matching.
+
+    Cache warmups pass count_lookup=False so they don't skew WORD_FREQUENCY.
+    """
     original_word = word
     word = word.lower()
     
     # Check if the exact word is in our cache
     if word in DICTIONARY_CACHE:
         # Increment word frequency counter
-        WORD_FREQUENCY[word] = WORD_FREQUENCY.get(word, 0) + 1
+        if count_lookup:
+            WORD_FREQUENCY[word] = WORD_FREQUENCY.get(word, 0) + 1
         return DICTIONARY_CACHE[word]
     
     # Try different word forms
     normalized = normalize_word(word)
     if normalized != word and normalized in DICTIONARY_CACHE:
-        WORD_FREQUENCY[normalized] = WORD_FREQUENCY.get(normalized, 0) + 1
+        if count_lookup:
+            WORD_FREQUENCY[normalized] = WORD_FREQUENCY.get(normalized, 0) + 1
         return DICTIONARY_CACHE[normalized]
     
+    # Look up word in the prebuilt definition store
+    if INDEX_ARTIFACT:
+        for form in (word, normalized):
+            meaning = lookup_definition(INDEX_ARTIFACT, form)
+            if meaning:
+                DICTIONARY_CACHE[word] = meaning
+                DICTIONARY_WORDS.add(word)
+                if count_lookup:
+                    WORD_FREQUENCY[word] = WORD_FREQUENCY.get(word, 0) + 1
+                return meaning
+    
     # Look up word in WordNet
     synsets = wn.synsets(word)
     if not synsets:
@@ -122,7 +174,8 @@ def get_word_meaning(word: str) -> Optional[str]:
             
             # Add to word list for client-side filtering and update frequency
             DICTIONARY_WORDS.add(word)
-            WORD_FREQUENCY[word] = WORD_FREQUENCY.get(word, 0) + 1
+            if count_lookup:
+                WORD_FREQUENCY[word] = WORD_FREQUENCY.get(word, 0) + 1
             
             return meaning
     
@@ -164,92 +217,423 @@ def generate_common_variations(word: str) -> List[str]:
     
     return variations[:10]  # Limit to 10 variations to avoid explosion
 
+def phonetic_ratio(word: str, candidate: str) -> float:
+    """Similarity of the Soundex codes, on the same 0-100 scale as fuzz scorers"""
+    return fuzz.ratio(soundex(word), soundex(candidate))
+
+def edit_distance_ratio(word: str, candidate: str) -> float:
+    """Damerau-Levenshtein similarity, which counts a transposition as one edit"""
+    return DamerauLevenshtein.normalized_similarity(word, candidate) * 100
+
+# Build a scoring profile with its matcher weights normalized once up front
+def make_scoring_profile(matchers: List[Tuple], threshold: float, freq_boost_cap: float,
+                         latency_budget_ms: float, prefilter: bool = False,
+                         fallback: Optional[str] = None, prefix_completion: bool = False) -> Dict:
+    """Precompute per-matcher weights so scoring a candidate is a plain weighted sum"""
+    total_weight = sum(weight for _, weight in matchers)
+    return {
+        "matchers": tuple((matcher, weight / total_weight) for matcher, weight in matchers),
+        "threshold": threshold,
+        "freq_boost_cap": freq_boost_cap,
+        "latency_budget": latency_budget_ms / 1000,
+        "prefilter": prefilter,  # Only valid for ratio-only profiles
+        "fallback": fallback,  # Cheaper profile to switch to when the budget is exceeded
+        "prefix_completion": prefix_completion,  # Suggest completions of a partly typed word
+    }
+
+# Named scoring profiles that can be chosen per request
+SCORING_PROFILES = {
+    # Autocomplete-as-you-type: one scorer over a length-prefiltered candidate set
+    "fast": make_scoring_profile(
+        [(fuzz.ratio, 1.0)],
+        threshold=60, freq_boost_cap=10, latency_budget_ms=10, prefilter=True,
+        prefix_completion=True,
+    ),
+    # The original weighting used by full searches
+    "balanced": make_scoring_profile(
+        [
+            (fuzz.ratio, 1.0),                 # Basic similarity
+            (fuzz.partial_ratio, 0.9),         # Good for substrings
+            (fuzz.token_sort_ratio, 0.8),      # Good for word order differences
+            (fuzz.token_set_ratio, 0.7),       # Good for additional/missing words
+        ],
+        threshold=60, freq_boost_cap=10, latency_budget_ms=50, fallback="fast",
+    ),
+    # All scorers plus phonetic and edit-distance tiers
+    "thorough": make_scoring_profile(
+        [
+            (fuzz.ratio, 1.0),
+            (fuzz.partial_ratio, 0.9),
+            (fuzz.token_sort_ratio, 0.8),
+            (fuzz.token_set_ratio, 0.7),
+            (phonetic_ratio, 0.6),             # Sounds-alike typos ("sekurity")
+            (edit_distance_ratio, 0.8),        # Transpositions and single edits
+        ],
+        threshold=55, freq_boost_cap=10, latency_budget_ms=200, fallback="balanced",
+    ),
+}
+DEFAULT_SCORING_PROFILE = os.getenv("DEFAULT_SCORING_PROFILE", "balanced")
+if DEFAULT_SCORING_PROFILE not in SCORING_PROFILES:
+    raise ValueError(
+        f"DEFAULT_SCORING_PROFILE must be one of {', '.join(SCORING_PROFILES)}, "
+        f"got {DEFAULT_SCORING_PROFILE!r}"
+    )
+BUDGET_CHECK_INTERVAL = 256  # Candidates scored between latency budget checks
+PREFIX_SCAN_LIMIT = 500  # Lexicon words read per prefix before ranking completions
+
+# Per-request deadline for the whole search_dictionary tier chain
+SEARCH_BUDGET_MS = float(os.getenv("SEARCH_BUDGET_MS", "150"))
+SEARCH_MAX_BUDGET_MS = float(os.getenv("SEARCH_MAX_BUDGET_MS", "500"))
+PROFILE_BUDGET_SHARE = 0.5  # Most of a request's budget a profile may use before falling back
+
+def search_deadline(budget_ms: Optional[float] = None) -> float:
+    """perf_counter() time by which a search arriving now must finish"""
+    return time.perf_counter() + min(budget_ms or SEARCH_BUDGET_MS, SEARCH_MAX_BUDGET_MS) / 1000
+
+def new_search_state(profile: Optional[str] = None, budget_ms: Optional[float] = None,
+                     deadline: Optional[float] = None) -> Dict:
+    """Per-request state shared by every tier of one search.
+
+    `deadline` is set when the request arrived earlier, e.g. before waiting in
+    the search queue; otherwise the budget starts now.
+    """
+    return {
+        "profile": profile or DEFAULT_SCORING_PROFILE,
+        "started": time.perf_counter(),
+        "deadline": deadline or search_deadline(budget_ms),
+        "downgraded_from": None,
+        "tiers_run": [],
+        "partial": False,
+    }
+
+def time_remaining(search_state: Dict) -> float:
+    """Seconds left before the request deadline"""
+    return search_state["deadline"] - time.perf_counter()
+
+def start_tier(search_state: Dict, tier: str) -> bool:
+    """Record a tier as run if the deadline allows it, otherwise mark the result partial"""
+    if time_remaining(search_state) <= 0:
+        search_state["partial"] = True
+        return False
+    search_state["tiers_run"].append(tier)
+    return True
+
+def finish_search(search_state: Dict, result: Dict) -> Dict:
+    """Attach the tiers that ran and the scoring profile used to a search result"""
+    result.update({
+        "profile": search_state["profile"],
+        "downgraded_from": search_state["downgraded_from"],
+        "tiers_run": search_state["tiers_run"],
+        "partial": search_state["partial"],
+    })
+    return result
+
+def check_latency_budget(search_state: Dict) -> Dict:
+    """Switch to the fallback profile once the active profile's budget is spent.
+
+    Budgets are capped at a share of the request's own budget, so a profile
+    like thorough (200 ms) still falls back under the default 150 ms deadline.
+    """
+    profile = SCORING_PROFILES[search_state["profile"]]
+    elapsed = time.perf_counter() - search_state["started"]
+    request_share = (search_state["deadline"] - search_state["started"]) * PROFILE_BUDGET_SHARE
+    while profile["fallback"] and elapsed > min(profile["latency_budget"], request_share):
+        if search_state["downgraded_from"] is None:
+            search_state["downgraded_from"] = search_state["profile"]
+        search_state["profile"] = profile["fallback"]
+        profile = SCORING_PROFILES[search_state["profile"]]
+    return profile
+
 # Multi-method fuzzy search with weighted scoring
-def advanced_fuzzy_match(word: str, candidates: List[str], limit: int = 5) -> List[Tuple[str, float]]:
-    """Use multiple fuzzy matching methods with weighted scoring"""
+def advanced_fuzzy_match(word: str, candidates: List[str], limit: int = 5,
+                         search_state: Optional[Dict] = None) -> List[Tuple[str, float]]:
+    """Use the active scoring profile's matchers with weighted scoring"""
     if not word or not candidates:
         return []
     
     word = word.lower()
+    if search_state is None:
+        search_state = new_search_state()
+    profile = check_latency_budget(search_state)
     
-    # Different matchers with weights
-    matchers = [
-        (fuzz.ratio, 1.0),                 # Basic similarity
-        (fuzz.partial_ratio, 0.9),         # Good for substrings
-        (fuzz.token_sort_ratio, 0.8),      # Good for word order differences
-        (fuzz.token_set_ratio, 0.7),       # Good for additional/missing words
-    ]
-    
-    # Calculate scores using different methods
+    # Calculate scores using the profile's matchers
     candidate_scores = {}
-    for candidate in candidates:
+    for index, candidate in enumerate(candidates):
+        # Downgrade mid-scan if this tier is eating the budget, stop at the deadline
+        if index and index % BUDGET_CHECK_INTERVAL == 0:
+            if time_remaining(search_state) <= 0:
+                search_state["partial"] = True
+                break
+            profile = check_latency_budget(search_state)
+        
         candidate_lower = candidate.lower()
         
         # Skip exact match, it would be caught earlier
         if candidate_lower == word:
             continue
-            
-        weighted_score = 0
-        for matcher, weight in matchers:
-            score = matcher(word, candidate_lower)
-            weighted_score += score * weight
-            
-        # Normalize the score
-        final_score = weighted_score / sum(weight for _, weight in matchers)
         
         # Boost score based on word frequency if available
-        freq_boost = min(WORD_FREQUENCY.get(candidate_lower, 0) * 0.5, 10)
+        freq_boost = min(WORD_FREQUENCY.get(candidate_lower, 0) * 0.5, profile["freq_boost_cap"])
+        
+        # fuzz.ratio can't exceed 200 * shorter / (combined length), so skip hopeless candidates
+        if profile["prefilter"]:
+            shorter = min(len(word), len(candidate_lower))
+            best_possible = 200 * shorter / (len(word) + len(candidate_lower))
+            if best_possible + freq_boost <= profile["threshold"]:
+                continue
+        
+        # Weights are already normalized, so this is the final score
+        final_score = 0
+        for matcher, weight in profile["matchers"]:
+            final_score += matcher(word, candidate_lower) * weight
         final_score += freq_boost
         
-        candidate_scores[candidate] = final_score
+        if final_score > profile["threshold"]:
+            candidate_scores[candidate] = final_score
     
     # Get top N results above threshold
-    threshold = 60  # Minimum score to consider
-    results = [(c, s) for c, s in candidate_scores.items() if s > threshold]
+    results = list(candidate_scores.items())
     results.sort(key=lambda x: x[1], reverse=True)
     
     return results[:limit]
 
+# Build the lexicon and WordNet collocation indexes used by phrase search
+def build_phrase_index():
+    """Index single-word lemmas, their bigrams and multi-word WordNet collocations"""
+    global LEXICON_LENGTHS
+    COLLOCATIONS.clear()
+    COLLOCATION_PREFIXES.clear()
+    PHRASE_QGRAMS.clear()
+    
+    if INDEX_ARTIFACT:
+        # The prebuilt artifact already holds the lexicon and its bigram postings
+        LEXICON_WORDS[:] = INDEX_ARTIFACT["lexicon"]
+        collocation_names = INDEX_ARTIFACT["collocations"]
+        offsets = INDEX_ARTIFACT["qgram_offsets"]
+        postings = INDEX_ARTIFACT["qgram_postings"]
+        for gram, i in INDEX_ARTIFACT["qgram_ids"].items():
+            PHRASE_QGRAMS[gram] = postings[int(offsets[i]):int(offsets[i + 1])]
+    else:
+        words = set(w for w in DICTIONARY_WORDS if w.isalpha())
+        collocation_names = []
+        try:
+            for name in wn.all_lemma_names():
+                name = name.lower()
+                if '_' in name:
+                    collocation_names.append(name)
+                    # Collocation parts must be reachable by token correction
+                    words.update(t for t in name.split('_') if t.isalpha())
+                elif name.isalpha():
+                    words.add(name)
+        except LookupError:
+            print("WordNet data not found. Phrase search will only use cached words.")
+        LEXICON_WORDS[:] = sorted(words)
+        keys, offsets, postings = build_postings(LEXICON_WORDS, lambda w: set(qgrams(w)))
+        for i, gram in enumerate(keys):
+            PHRASE_QGRAMS[gram] = postings[offsets[i]:offsets[i + 1]]
+    
+    LEXICON_LENGTHS = np.array([len(w) for w in LEXICON_WORDS], dtype=np.int32)
+    for name in collocation_names:
+        tokens = tuple(t for t in name.split('_') if t)
+        if 1 < len(tokens) <= PHRASE_MAX_TOKENS:
+            COLLOCATIONS[tokens] = name
+            for end in range(1, len(tokens)):
+                COLLOCATION_PREFIXES.add(tokens[:end])
+
+def max_token_edits(token: str) -> int:
+    """Edits allowed when correcting a token; short words still get one"""
+    if len(token) <= 4:
+        return 1
+    return 2 if len(token) <= 8 else 3
+
+def token_neighbourhood(token: str) -> np.ndarray:
+    """Lexicon ids that can be within max_token_edits of token, capped to the closest few"""
+    edits = max_token_edits(token)
+    lists = [PHRASE_QGRAMS[gram] for gram in set(qgrams(token)) if gram in PHRASE_QGRAMS]
+    if not lists:
+        return np.zeros(0, dtype=np.int64)
+    ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+    # An edit destroys at most 3 padded bigrams (transposition), so close words share the rest
+    keep = (counts >= max(1, len(token) + 1 - 3 * edits)) & \
+           (np.abs(LEXICON_LENGTHS[ids] - len(token)) <= edits)
+    ids, counts = ids[keep], counts[keep]
+    # Bound the scoring work per token: words sharing the most bigrams are the likely matches
+    if len(ids) > PHRASE_NEIGHBOURHOOD_LIMIT:
+        ids = ids[np.argpartition(counts, -PHRASE_NEIGHBOURHOOD_LIMIT)[-PHRASE_NEIGHBOURHOOD_LIMIT:]]
+    return ids
+
+# Correct phrase tokens against their q-gram neighbourhoods of the lexicon
+def correct_tokens(tokens: List[str], search_state: Optional[Dict] = None) -> List[List[Tuple[str, float]]]:
+    """Return up to PHRASE_CANDIDATES_PER_TOKEN (word, score) corrections per token.
+
+    A token that is already a word comes first in its own list, but its
+    neighbours are kept too so real-word typos ("hot dig") can still match.
+    Tokens left when the search deadline passes get no corrections.
+    """
+    candidates = []
+    for token in tokens:
+        if search_state is not None and time_remaining(search_state) <= 0:
+            search_state["partial"] = True
+            candidates.append([])
+            continue
+        edits = max_token_edits(token)
+        choices = [LEXICON_WORDS[i] for i in token_neighbourhood(token).tolist()]
+        if not choices:
+            candidates.append([])
+            continue
+        
+        # One batched cdist call per token, over at most PHRASE_NEIGHBOURHOOD_LIMIT words
+        distances = process.cdist([token], choices, scorer=DamerauLevenshtein.distance,
+                                  score_cutoff=edits, workers=1)[0]
+        ranked = []
+        for j in np.flatnonzero(distances <= edits).tolist():
+            word = choices[j]
+            ranked.append((int(distances[j]), -fuzz.ratio(token, word), word))
+        ranked.sort()
+        candidates.append([(word, -negated_ratio)
+                           for _, negated_ratio, word in ranked[:PHRASE_CANDIDATES_PER_TOKEN]])
+    
+    return candidates
+
+def match_collocations(candidates: List[List[Tuple[str, float]]]) -> List[Tuple[str, float]]:
+    """Walk token corrections left to right, only extending prefixes some collocation has"""
+    matches = []
+    
+    def extend(prefix: Tuple[str, ...], total: float):
+        depth = len(prefix)
+        for word, score in candidates[depth]:
+            key = prefix + (word,)
+            if depth + 1 == len(candidates):
+                if key in COLLOCATIONS:
+                    matches.append((" ".join(key), (total + score) / len(candidates)))
+            elif key in COLLOCATION_PREFIXES:
+                extend(key, total + score)
+    
+    if all(candidates):
+        extend((), 0.0)
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+# Phrase-aware search for multi-word queries like "computr progrm"
+def search_phrase(raw_tokens: List[str], tokens: List[str],
+                  search_state: Optional[Dict] = None) -> Tuple[Dict, bool]:
+    """Correct each token, then match the combinations against WordNet collocations.
+
+    `raw_tokens` are the lowercased query tokens and `tokens` their lemmatized
+    forms. Also returns whether any collocation matched.
+    """
+    # An exact collocation needs no correction at all; the raw tokens go first
+    # so plural collocations like "united states" aren't lemmatized away
+    for phrase_tokens in (raw_tokens, tokens):
+        collocation = COLLOCATIONS.get(tuple(phrase_tokens))
+        meaning = collocation and get_word_meaning(collocation)
+        if meaning:
+            return {
+                "exact_match": True,
+                "word": " ".join(phrase_tokens),
+                "meaning": meaning
+            }, True
+    
+    candidates = correct_tokens(tokens, search_state)
+    
+    # Rank the combinations of corrections that form a known collocation
+    suggestions = [phrase for phrase, _ in match_collocations(candidates)]
+    matched = bool(suggestions)
+    
+    # Follow with the best single-word correction for each token
+    for token_candidates in candidates:
+        if token_candidates and token_candidates[0][0] not in suggestions:
+            suggestions.append(token_candidates[0][0])
+    
+    return {
+        "exact_match": False,
+        "suggestions": suggestions[:5]  # Limit to 5 suggestions
+    }, matched
+
 # Enhanced search dictionary function
-def search_dictionary(word: str) -> Dict:
-    """Enhanced search function with better typo handling"""
+def search_dictionary(word: str, profile: Optional[str] = None,
+                      budget_ms: Optional[float] = None, deadline: Optional[float] = None) -> Dict:
+    """Enhanced search function with better typo handling.
+
+    Tiers run in order (exact, normalized, prefix completion for autocomplete
+    profiles, dictionary fuzzy, WordNet, prebuilt index when loaded, variations)
+    until the request's `budget_ms` deadline (or an absolute `deadline` from
+    search_deadline()) passes; skipped tiers set `partial`.
+    `profile` names an entry in SCORING_PROFILES; it may be downgraded to a
+    cheaper profile if the fuzzy tiers exceed its latency budget.
+    """
     # Try to standardize the word first
     original_word = word
     word = word.lower().strip()
+    search_state = new_search_state(profile, budget_ms, deadline)
+    
+    # Multi-word queries go through the phrase-aware path
+    raw_tokens = [token.translate(str.maketrans('', '', string.punctuation)) for token in word.split()]
+    raw_tokens = [token for token in raw_tokens if token]
+    phrase_suggestions = []
+    compound_from = None
+    if 1 < len(raw_tokens) <= PHRASE_MAX_TOKENS:
+        if not start_tier(search_state, "phrase"):
+            return finish_search(search_state, {"exact_match": False, "suggestions": []})
+        tokens = [normalize_word(token) for token in raw_tokens]
+        result, matched = search_phrase(raw_tokens, tokens, search_state)
+        if matched:
+            return finish_search(search_state, result)
+        # No collocation: it may be a compound typed with spaces ("data base"),
+        # so run the single-word tiers on the joined tokens too
+        phrase_suggestions = result["suggestions"]
+        compound_from = word  # The spaced query, e.g. "data base"
+        word = "".join(raw_tokens)
     
-    # Check for exact match first
+    # Check for exact match first; this tier always runs
+    search_state["tiers_run"].append("exact")
     meaning = get_word_meaning(word)
+    if meaning and compound_from:
+        # Separate words that spell a known word are a guess, so suggest it first
+        suggestions = [word] + [s for s in phrase_suggestions if s != word]
+        return finish_search(search_state, {
+            "exact_match": False,
+            "suggestions": suggestions[:5]
+        })
     if meaning:
-        return {
+        return finish_search(search_state, {
             "exact_match": True,
             "word": word,
             "meaning": meaning
-        }
+        })
     
     # If not exact, try normalized form
     normalized = normalize_word(word)
-    if normalized != word:
+    if normalized != word and start_tier(search_state, "normalized"):
         meaning = get_word_meaning(normalized)
         if meaning:
-            return {
+            return finish_search(search_state, {
                 "exact_match": True,
                 "word": normalized,
                 "meaning": meaning,
                 "normalized_from": word
-            }
+            })
     
-    # No exact match, try advanced fuzzy matching
     suggestions = []
     
-    # First try against our cached dictionary
-    if DICTIONARY_WORDS:
+    # Autocomplete: the word may still be being typed, so offer the prebuilt index's completions
+    if (INDEX_ARTIFACT and SCORING_PROFILES[search_state["profile"]]["prefix_completion"]
+            and start_tier(search_state, "prefix")):
+        completions = prefix_candidates(INDEX_ARTIFACT, word, limit=PREFIX_SCAN_LIMIT)
+        completions.sort(key=lambda w: (-WORD_FREQUENCY.get(w, 0), len(w), w))
+        suggestions.extend(completions[:5])
+    
+    # No exact match, try advanced fuzzy matching, first against our cached dictionary
+    if DICTIONARY_WORDS and start_tier(search_state, "dictionary_fuzzy"):
         # Use advanced fuzzy matching with multiple algorithms
-        matches = advanced_fuzzy_match(word, list(DICTIONARY_WORDS), limit=5)
-        if matches:
-            suggestions = [match[0] for match in matches]
+        matches = advanced_fuzzy_match(word, list(DICTIONARY_WORDS), limit=5,
+                                       search_state=search_state)
+        for match, _ in matches:
+            if match not in suggestions:
+                suggestions.append(match)
     
     # If we don't have enough good suggestions, use WordNet
-    if len(suggestions) < 3:
+    if len(suggestions) < 3 and start_tier(search_state, "wordnet"):
         # Try to find similar words in WordNet
         all_words = set()
         
@@ -277,7 +661,8 @@ def search_dictionary(word: str) -> Dict:
             single_words = [w for w in all_words if '_' not in w]
             
             if single_words:
-                wordnet_matches = advanced_fuzzy_match(word, list(single_words), limit=3)
+                wordnet_matches = advanced_fuzzy_match(word, list(single_words), limit=3,
+                                                       search_state=search_state)
                 wordnet_suggestions = [match[0] for match in wordnet_matches]
                 
                 # Add these to our suggestions, avoiding duplicates
@@ -285,26 +670,44 @@ def search_dictionary(word: str) -> Dict:
                     if suggestion not in suggestions:
                         suggestions.append(suggestion)
     
+    # Typos WordNet can't resolve: q-gram and phonetic neighbours from the prebuilt index
+    if len(suggestions) < 3 and INDEX_ARTIFACT and start_tier(search_state, "index"):
+        candidates = set(phonetic_candidates(INDEX_ARTIFACT, word))
+        candidates.update(qgram_candidates(INDEX_ARTIFACT, word))
+        index_matches = advanced_fuzzy_match(word, list(candidates), limit=3,
+                                             search_state=search_state)
+        for match, _ in index_matches:
+            if match not in suggestions:
+                suggestions.append(match)
+    
     # If still no good suggestions, try common spelling variations
-    if len(suggestions) < 3:
+    if len(suggestions) < 3 and start_tier(search_state, "variations"):
         variations = generate_common_variations(word)
         for var in variations:
+            if time_remaining(search_state) <= 0:
+                search_state["partial"] = True
+                break
             if get_word_meaning(var) and var not in suggestions:
                 suggestions.append(var)
             if len(suggestions) >= 5:  # Limit to 5 total suggestions
                 break
     
-    # Return results
-    if suggestions:
-        return {
-            "exact_match": False,
-            "suggestions": suggestions[:5]  # Limit to 5 suggestions
-        }
+    # Per-token corrections of an unmatched phrase come after the compound's suggestions
+    for suggestion in phrase_suggestions:
+        if suggestion not in suggestions:
+            suggestions.append(suggestion)
     
-    return {
+    # Return results
+    return finish_search(search_state, {
         "exact_match": False,
-        "suggestions": []
-    }
+        "suggestions": suggestions[:5]  # Limit to 5 suggestions
+    })
+
+def expired_search(profile: Optional[str] = None) -> Dict:
+    """Empty partial result for a search whose deadline passed before it could finish"""
+    search_state = new_search_state(profile)
+    search_state["partial"] = True
+    return finish_search(search_state, {"exact_match": False, "suggestions": []})
 
 # Load some common words to populate the initial word list
 def load_common_words():
@@ -323,9 +726,137 @@ def load_common_words():
         if meaning:
             DICTIONARY_WORDS.add(word)
             WORD_FREQUENCY[word] = 1  # Initialize frequency
+    
+    # Frequency seeds from dictionary.json and custom word lists in the prebuilt index
+    if INDEX_ARTIFACT:
+        for word, count in INDEX_ARTIFACT["frequency"].items():
+            if get_word_meaning(word, count_lookup=False):
+                DICTIONARY_WORDS.add(word)
+                WORD_FREQUENCY.setdefault(word, count)
 
 # Initialize common words
 load_common_words()
+build_phrase_index()
+
+# Prefetch likely next lookups from each user's search history (see search_history.py)
+PREFETCH_LIMIT = 5  # Definitions warmed per prefetch
+
+def cache_key(word: str) -> str:
+    """DICTIONARY_CACHE key of a searched word; phrases are cached as collocations ("hot_dog")"""
+    return "_".join(word.lower().split())
+
+def predict_next_lookups(username: str, result: Optional[Dict] = None) -> List[str]:
+    """Guess the user's likely next lookups as cache keys: current suggestions, then their most repeated words"""
+    candidates = []
+    if result and not result.get("exact_match"):
+        candidates.extend(result.get("suggestions") or [])
+    counts = Counter(entry["word"] for entry in get_user_history(username))
+    candidates.extend(word for word, _ in counts.most_common())
+    
+    predicted = []
+    for word in map(cache_key, candidates):
+        if word not in predicted and word not in DICTIONARY_CACHE:
+            predicted.append(word)
+        if len(predicted) >= PREFETCH_LIMIT:
+            break
+    return predicted
+
+def prefetch_definitions(words: List[str]):
+    """Warm the definition cache without counting the lookups as real searches"""
+    for word in words:
+        try:
+            get_word_meaning(word, count_lookup=False)
+        except Exception as e:
+            print(f"Prefetch failed for {word}: {e}")
+
+load_search_history()
+
+# Per-user token buckets for /search: cache hits and full fuzzy searches get separate budgets
+RATE_LIMITS = {
+    # kind: (tokens refilled per second, bucket size)
+    "exact": (float(os.getenv("RATE_EXACT_PER_SEC", "20")), float(os.getenv("RATE_EXACT_BURST", "40"))),
+    "fuzzy": (float(os.getenv("RATE_FUZZY_PER_SEC", "5")), float(os.getenv("RATE_FUZZY_BURST", "10"))),
+}
+for kind, (rate, burst) in RATE_LIMITS.items():
+    if rate <= 0 or burst < 1:
+        raise ValueError(
+            f"RATE_{kind.upper()}_PER_SEC must be > 0 and RATE_{kind.upper()}_BURST >= 1, "
+            f"got {rate} and {burst}"
+        )
+RATE_BUCKETS: Dict[Tuple[str, str], Dict] = {}  # (username, kind) -> bucket state
+
+def take_rate_token(username: str, kind: str) -> float:
+    """Spend one token from the user's bucket; return 0 if allowed, else seconds until one refills"""
+    rate, burst = RATE_LIMITS[kind]
+    now = time.monotonic()
+    bucket = RATE_BUCKETS.setdefault((username, kind), {"tokens": burst, "updated": now})
+    bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["updated"]) * rate)
+    bucket["updated"] = now
+    if bucket["tokens"] >= 1:
+        bucket["tokens"] -= 1
+        return 0.0
+    return (1 - bucket["tokens"]) / rate
+
+def is_cached_lookup(word: str) -> bool:
+    """True when the search will be answered straight from the definition cache"""
+    tokens = word.lower().split()
+    # Phrases are cached under their collocation name, e.g. "hot dog" -> "hot_dog"
+    return " ".join(tokens) in DICTIONARY_CACHE or "_".join(tokens) in DICTIONARY_CACHE
+
+# Fair scheduling of fuzzy searches: per-user queues served round-robin by a few workers
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "1"))
+MAX_QUEUED_PER_USER = int(os.getenv("MAX_QUEUED_PER_USER", "4"))
+SEARCH_DEADLINE_GRACE = float(os.getenv("SEARCH_DEADLINE_GRACE_MS", "50")) / 1000  # For the tier running at the deadline
+SEARCH_QUEUES: Dict[str, deque] = {}  # username -> pending (future, deadline, func, args, kwargs)
+READY_USERS: deque = deque()  # Users with pending work, in round-robin order
+
+def search_queue_full(username: str) -> bool:
+    return len(SEARCH_QUEUES.get(username, ())) >= MAX_QUEUED_PER_USER
+
+async def schedule_search(username: str, deadline: float, func, /, *args, **kwargs):
+    """Queue a fuzzy search behind the user's earlier ones and wait for its result.
+
+    Returns None if `deadline` (a perf_counter() time) passes first, either
+    while the job is still queued or while it runs. The scheduler's own
+    parameters are positional-only so `deadline=` can be forwarded to func.
+    """
+    future = asyncio.get_running_loop().create_future()
+    queue = SEARCH_QUEUES.setdefault(username, deque())
+    if not queue:
+        READY_USERS.append(username)
+    queue.append((future, deadline, func, args, kwargs))
+    app.state.search_pending.release()
+    timeout = max(0.0, deadline - time.perf_counter()) + SEARCH_DEADLINE_GRACE
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return None  # The cancelled job is dropped when a worker reaches it
+
+async def run_search_worker():
+    """Take one job from the next user in turn, so a busy user can't starve the others"""
+    while True:
+        await app.state.search_pending.acquire()
+        username = READY_USERS.popleft()
+        queue = SEARCH_QUEUES[username]
+        future, deadline, func, args, kwargs = queue.popleft()
+        if queue:
+            READY_USERS.append(username)  # Back of the line for their next job
+        else:
+            del SEARCH_QUEUES[username]
+        
+        if future.cancelled():
+            continue  # Client went away or timed out while queued
+        if time.perf_counter() >= deadline:
+            future.set_result(None)  # Shed: no budget left to search with
+            continue
+        try:
+            # Run off the event loop so auth, history and cache hits stay responsive
+            result = await asyncio.to_thread(func, *args, **kwargs)
+            if not future.cancelled():
+                future.set_result(result)
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
 
 # Generate a new hash for "password" using direct bcrypt, not passlib
 def generate_password_hash():
@@ -357,6 +888,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],  # Lets the frontend read it from 429 responses
 )
 
 # Modified password verification using direct bcrypt, not passlib context
@@ -395,12 +927,18 @@ class UserInDB(User):
 
 class SearchRequest(BaseModel):
     word: str
+    profile: Optional[str] = None  # Scoring profile name, see SCORING_PROFILES
+    budget_ms: Optional[float] = Field(default=None, gt=0)  # Capped at SEARCH_MAX_BUDGET_MS
 
 class SearchResponse(BaseModel):
     exact_match: bool
     word: Optional[str] = None
     meaning: Optional[str] = None
     suggestions: Optional[List[str]] = None
+    profile: Optional[str] = None
+    downgraded_from: Optional[str] = None
+    tiers_run: Optional[List[str]] = None
+    partial: bool = False
 
 # Authentication functions
 def get_user(db, username: str):
@@ -488,9 +1026,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
     return user
 
+# Periodically flush search history to disk
+@app.on_event("startup")
+async def start_history_flusher():
+    app.state.history_flusher = asyncio.create_task(flush_history_periodically())
+
+@app.on_event("shutdown")
+async def stop_history_flusher():
+    app.state.history_flusher.cancel()
+    flush_search_history()
+
+@app.on_event("startup")
+async def start_search_workers():
+    app.state.search_pending = asyncio.Semaphore(0)
+    app.state.search_workers = [asyncio.create_task(run_search_worker()) for _ in range(SEARCH_WORKERS)]
+
+@app.on_event("shutdown")
+async def stop_search_workers():
+    for worker in app.state.search_workers:
+        worker.cancel()
+
 # API endpoints
 @app.post("/token", response_model=Token)
-async def login_for_access_token(response: Response, form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(response: Response, background_tasks: BackgroundTasks,
+                                 form_data: OAuth2PasswordRequestForm = Depends()):
     user = authenticate_user(USERS_DB, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -513,6 +1072,9 @@ async def login_for_access_token(response: Response, form_data: OAuth2PasswordRe
         max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60
     )
     
+    # Warm the cache with the words this user looks up most
+    background_tasks.add_task(prefetch_definitions, predict_next_lookups(user.username))
+    
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/logout")
@@ -528,10 +1090,48 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 @app.post("/search", response_model=SearchResponse)
 async def search_word(
     search_req: SearchRequest, 
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_from_cookie_or_header)
 ):
+    if search_req.profile and search_req.profile not in SCORING_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown scoring profile. Choose one of: {', '.join(SCORING_PROFILES)}",
+        )
+    
+    # The budget covers time spent queued, so it starts when the request arrives
+    deadline = search_deadline(search_req.budget_ms)
+    
+    # Cache hits are cheap and spend from their own, larger budget
+    username = current_user.username
+    kind = "exact" if is_cached_lookup(search_req.word) else "fuzzy"
+    # A full queue rejects before spending a token, so the retry isn't penalised twice
+    if kind == "fuzzy" and search_queue_full(username):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many searches in progress. Please slow down.",
+            headers={"Retry-After": "1"},
+        )
+    retry_after = take_rate_token(username, kind)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many searches. Please slow down.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    
     try:
-        result = search_dictionary(search_req.word)
+        if kind == "exact":
+            result = search_dictionary(search_req.word, profile=search_req.profile,
+                                       deadline=deadline)
+        else:
+            result = await schedule_search(username, deadline, search_dictionary, search_req.word,
+                                           profile=search_req.profile, deadline=deadline)
+            if result is None:
+                result = expired_search(search_req.profile)
+        record_search(username, result)
+        background_tasks.add_task(prefetch_definitions,
+                                  predict_next_lookups(username, result))
         return result
     except Exception as e:
         print(f"Error processing search: {e}")
@@ -604,6 +1204,22 @@ async def get_dictionary_words(current_user: User = Depends(get_current_user_fro
     
     return {"words": word_list[:1000]}  # Limit to 1000 words max
 
+# Per-user recent search history
+@app.get("/history")
+async def get_search_history(
+    limit: int = 20,
+    current_user: User = Depends(get_current_user_from_cookie_or_header)
+):
+    """Return the user's most recent exact-match searches, newest first"""
+    entries = list(get_user_history(current_user.username))
+    entries.reverse()
+    return {"history": entries[:max(limit, 0)]}
+
+@app.delete("/history")
+async def clear_search_history(current_user: User = Depends(get_current_user_from_cookie_or_header)):
+    clear_history(current_user.username)
+    return {"message": "Search history cleared"}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; only single-process servers are safe there
+    fcntl = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Per-user recent search history, keyed on the JWT "sub" claim
+HISTORY_SIZE = int(os.getenv("HISTORY_SIZE", "50"))  # Entries kept per user
+HISTORY_FILE = os.getenv("HISTORY_FILE", os.path.join(BACKEND_DIR, "search_history.json"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "30"))
+SEARCH_HISTORY: Dict[str, deque] = {}  # username -> ring buffer of entries
+CLEARED_AT: Dict[str, str] = {}  # username -> timestamp of their last DELETE /history
+DIRTY_USERS = set()  # Users with changes not yet flushed
+
+def get_user_history(username: str) -> deque:
+    """Return the user's ring buffer, creating it on first use"""
+    if username not in SEARCH_HISTORY:
+        SEARCH_HISTORY[username] = deque(maxlen=HISTORY_SIZE)
+    return SEARCH_HISTORY[username]
+
+def record_search(username: str, result: Dict):
+    """Append an exact-match search to the user's history; the oldest entry drops out"""
+    if not result.get("exact_match"):
+        return
+    get_user_history(username).append({
+        "word": result["word"],
+        "meaning": result.get("meaning"),
+        "timestamp": datetime.utcnow().isoformat(timespec="microseconds"),
+    })
+    DIRTY_USERS.add(username)
+
+def clear_history(username: str):
+    get_user_history(username).clear()
+    CLEARED_AT[username] = datetime.utcnow().isoformat(timespec="microseconds")
+    DIRTY_USERS.add(username)
+
+def merge_entries(entry_lists: List[List[Dict]], cleared_at: Optional[str] = None) -> List[Dict]:
+    """Union several views of one user's history, oldest first, dropping cleared entries"""
+    merged = {}
+    for entries in entry_lists:
+        for entry in entries:
+            if cleared_at is None or entry["timestamp"] > cleared_at:
+                merged[(entry["timestamp"], entry["word"])] = entry
+    return [merged[key] for key in sorted(merged)][-HISTORY_SIZE:]
+
+def read_history_file(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return {"entries": {}, "cleared_at": {}}
+    return {"entries": saved.get("entries", {}), "cleared_at": saved.get("cleared_at", {})}
+
+def load_search_history(path: Optional[str] = None):
+    """Restore history saved by a previous run or by other worker processes"""
+    try:
+        saved = read_history_file(path or HISTORY_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Could not load search history: {e}")
+        return
+    CLEARED_AT.update(saved["cleared_at"])
+    for username, entries in saved["entries"].items():
+        history = get_user_history(username)
+        merged = merge_entries([list(history), entries], CLEARED_AT.get(username))
+        history.clear()
+        history.extend(merged)
+
+def snapshot_search_history() -> Optional[Dict]:
+    """Copy the dirty users' buffers; call on the event loop, where they are mutated"""
+    if not DIRTY_USERS:
+        return None
+    users = list(DIRTY_USERS)
+    DIRTY_USERS.clear()
+    return {
+        "entries": {username: list(get_user_history(username)) for username in users},
+        "cleared_at": {username: CLEARED_AT[username] for username in users if username in CLEARED_AT},
+    }
+
+def write_search_history(snapshot: Dict, path: Optional[str] = None) -> Dict:
+    """Merge a snapshot into the history file under a lock and return the merged users.
+
+    Every uvicorn worker process flushes to the same file, so each write
+    merges with what the others saved instead of overwriting it.
+    """
+    path = path or HISTORY_FILE
+    with open(path + ".lock", "w") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        saved = read_history_file(path)
+        for username, cleared_at in snapshot["cleared_at"].items():
+            saved["cleared_at"][username] = max(cleared_at, saved["cleared_at"].get(username, ""))
+        merged = {}
+        for username, entries in snapshot["entries"].items():
+            merged[username] = merge_entries(
+                [saved["entries"].get(username, []), entries],
+                saved["cleared_at"].get(username),
+            )
+            saved["entries"][username] = merged[username]
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(saved, f)
+        os.replace(tmp_path, path)
+    return {
+        "entries": merged,
+        "cleared_at": {username: saved["cleared_at"][username]
+                       for username in merged if username in saved["cleared_at"]},
+    }
+
+def apply_merged_history(merged: Dict):
+    """Fold entries other workers saved into the local buffers; call on the event loop"""
+    for username, cleared_at in merged["cleared_at"].items():
+        CLEARED_AT[username] = max(cleared_at, CLEARED_AT.get(username, ""))
+    for username, entries in merged["entries"].items():
+        history = get_user_history(username)
+        combined = merge_entries([list(history), entries], CLEARED_AT.get(username))
+        history.clear()
+        history.extend(combined)
+
+def flush_search_history():
+    """Synchronous flush, used at shutdown"""
+    snapshot = snapshot_search_history()
+    if snapshot is None:
+        return
+    try:
+        apply_merged_history(write_search_history(snapshot))
+    except (OSError, ValueError) as e:
+        DIRTY_USERS.update(snapshot["entries"])
+        print(f"Could not save search history: {e}")
+
+async def flush_history_periodically():
+    """Snapshot on the event loop, write in a thread, and keep going after errors"""
+    while True:
+        await asyncio.sleep(HISTORY_FLUSH_SECONDS)
+        snapshot = snapshot_search_history()
+        if snapshot is None:
+            continue
+        try:
+            merged = await asyncio.to_thread(write_search_history, snapshot)
+        except (OSError, ValueError) as e:
+            DIRTY_USERS.update(snapshot["entries"])  # Try again on the next flush
+            print(f"Could not save search history: {e}")
+            continue
+        apply_merged_history(merged)
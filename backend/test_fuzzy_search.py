@@ -1,8 +1,12 @@
 import json
-from main import search_dictionary, load_common_words
+from main import (
+    search_dictionary, load_common_words, build_phrase_index,
+    SCORING_PROFILES, SEARCH_MAX_BUDGET_MS, new_search_state, check_latency_budget,
+)
 
 # Initialize the dictionary
 load_common_words()
+build_phrase_index()
 
 def test_fuzzy_search():
     """Test the fuzzy search with various typos and edge cases"""
@@ -63,5 +67,104 @@ def test_fuzzy_search():
     print(f"Successful matches: {success_count}")
     print(f"Success rate: {success_count / len(test_cases) * 100:.1f}%")
 
+def test_phrase_search():
+    """Test phrase-aware search against WordNet collocations"""
+    test_cases = [
+        ("hot dog", "hot dog"),  # Exact collocation
+        ("hot dogs", "hot dog"),  # Plural collocation
+        ("computr progrm", "computer program"),  # Typos in every token
+        ("hot dgo", "hot dog"),  # Letters swapped in a short token
+        ("hot dig", "hot dog"),  # Real-word typo
+        ("sea loin", "sea lion"),  # Real-word typo with swapped letters
+        ("united states", "united states"),  # Plural collocation that must not be lemmatized
+        ("blue jeans", "blue jeans"),  # Plural collocation with a singular sibling
+        ("data base", "database"),  # Compound typed as two words
+    ]
+    
+    print("\n=== PHRASE SEARCH TEST RESULTS ===\n")
+    success_count = 0
+    for test_input, expected in test_cases:
+        result = search_dictionary(test_input)
+        if result["exact_match"]:
+            success = result["word"] == expected
+        else:
+            success = expected in result["suggestions"]
+        success_count += success
+        
+        status = "✅" if success else "❌"
+        print(f"{test_input:<20} | {str(result['exact_match']):<12} | {result.get('word') or result['suggestions']} {status}")
+        assert success, f"{test_input!r}: expected {expected!r}, got {result.get('word') or result['suggestions']}"
+    
+    print(f"\nPhrase success rate: {success_count / len(test_cases) * 100:.1f}%")
+
+def test_scoring_profiles():
+    """Compare success rate and profile downgrades across scoring profiles"""
+    test_cases = [
+        ("pyhton", "python"),
+        ("javscript", "javascript"),
+        ("algorythm", "algorithm"),
+        ("sekurity", "security"),
+        ("authntication", "authentication"),
+    ]
+    
+    print("\n=== SCORING PROFILE RESULTS ===\n")
+    for profile in SCORING_PROFILES:
+        success_count = 0
+        downgrades = 0
+        for test_input, expected in test_cases:
+            result = search_dictionary(test_input, profile=profile)
+            # The requested profile is reported, or named as the one downgraded from
+            assert result["profile"] in SCORING_PROFILES
+            if result["downgraded_from"] is None:
+                assert result["profile"] == profile
+            else:
+                assert result["downgraded_from"] == profile
+                assert result["profile"] != profile
+            if result["exact_match"]:
+                success_count += result["word"] == expected
+            else:
+                success_count += expected in result["suggestions"]
+                downgrades += result["downgraded_from"] is not None
+        print(f"{profile:<10} | success: {success_count}/{len(test_cases)} | downgraded: {downgrades}")
+    
+    # A spent budget walks the fallback chain down to the cheapest profile
+    search_state = new_search_state("thorough")
+    search_state["started"] -= 1
+    assert check_latency_budget(search_state) is SCORING_PROFILES["fast"]
+    assert search_state["profile"] == "fast"
+    assert search_state["downgraded_from"] == "thorough"
+    
+    # Under the default request deadline thorough falls back before its own 200 ms budget
+    for budget_ms, downgraded in ((None, True), (SEARCH_MAX_BUDGET_MS, False)):
+        search_state = new_search_state("thorough", budget_ms)
+        search_state["started"] -= 0.1
+        search_state["deadline"] -= 0.1
+        check_latency_budget(search_state)
+        assert (search_state["downgraded_from"] == "thorough") == downgraded, budget_ms
+
+def test_search_budget():
+    """Test that a tiny budget skips later tiers and flags the result as partial"""
+    print("\n=== SEARCH BUDGET RESULTS ===\n")
+    for budget_ms in (None, 0.001):
+        result = search_dictionary("zzqxv", budget_ms=budget_ms)
+        print(f"budget_ms={budget_ms} | tiers: {', '.join(result['tiers_run'])} | partial: {result['partial']}")
+    
+    # The exact tier always runs; everything after it is skipped once the budget is gone
+    result = search_dictionary("zzqxv", budget_ms=0.001)
+    assert result["partial"]
+    assert result["tiers_run"] == ["exact"]
+    
+    # Phrase queries are gated by the same deadline
+    result = search_dictionary("computr progrm", budget_ms=0.001)
+    assert result["partial"]
+    assert "phrase" not in result["tiers_run"]
+    
+    result = search_dictionary("zzqxv")
+    assert not result["partial"]
+    assert result["tiers_run"][0] == "exact"
+
 if __name__ == "__main__":
     test_fuzzy_search()
+    test_phrase_search()
+    test_scoring_profiles()
+    test_search_budget()
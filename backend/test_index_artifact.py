@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+from build_index import write_artifact
+from index_artifact import (
+    ArtifactError, load_artifact, load_current_artifact, lookup_definition,
+    prefix_candidates, qgram_candidates, phonetic_candidates,
+)
+
+LEXICON = sorted(["compile", "compiler", "computer", "compute", "dog", "hot", "program", "python"])
+COLLOCATIONS = ["hot_dog"]
+DEFINITIONS = {
+    "computer": "a machine for performing calculations automatically",
+    "dog": "a domesticated carnivorous mammal",
+    "hot_dog": "a frankfurter served hot on a bun",
+    "python": "large Old World boas; a high-level programming language",
+}
+
+def write_test_artifact(output, version="v1"):
+    return write_artifact(output, LEXICON, COLLOCATIONS, DEFINITIONS, {"computer": 1},
+                          {"dictionary": "test"}, version=version)
+
+def test_round_trip():
+    """build -> load -> lookup returns exactly what was written"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_test_artifact(tmp)
+        artifact = load_current_artifact(tmp)
+        assert artifact["path"] == path
+        assert artifact["lexicon"] == LEXICON
+        assert artifact["collocations"] == COLLOCATIONS
+        assert artifact["frequency"] == {"computer": 1}
+
+        for word, meaning in DEFINITIONS.items():
+            assert lookup_definition(artifact, word) == meaning, word
+        assert lookup_definition(artifact, "compile") is None
+        assert lookup_definition(artifact, "zebra") is None
+
+        assert prefix_candidates(artifact, "comp") == ["compile", "compiler", "compute", "computer"]
+        assert prefix_candidates(artifact, "compu", limit=1) == ["compute"]
+        assert prefix_candidates(artifact, "zz") == []
+        assert "computer" in qgram_candidates(artifact, "computr")
+        assert "python" in phonetic_candidates(artifact, "pithon")
+
+def test_checksum_mismatch():
+    """A tampered file is rejected instead of being served"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_test_artifact(tmp)
+        with open(os.path.join(path, "definitions.txt"), "r+b") as f:
+            f.write(b"A")
+        try:
+            load_artifact(path)
+        except ArtifactError as e:
+            assert "definitions.txt" in str(e)
+        else:
+            raise AssertionError("tampered artifact loaded without error")
+
+def test_missing_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_test_artifact(tmp)
+        os.remove(os.path.join(path, "prefix_ranges.npy"))
+        try:
+            load_artifact(path)
+        except ArtifactError as e:
+            assert "prefix_ranges.npy" in str(e)
+        else:
+            raise AssertionError("incomplete artifact loaded without error")
+
+def test_no_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert load_current_artifact(tmp) is None
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_checksum_mismatch()
+    test_missing_file()
+    test_no_index()
+    print("Index artifact tests passed")
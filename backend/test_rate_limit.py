@@ -0,0 +1,117 @@
+import asyncio
+import os
+import tempfile
+import time
+
+# Keep the shutdown flush out of the real history file
+os.environ.setdefault("HISTORY_FILE", os.path.join(tempfile.mkdtemp(), "search_history.json"))
+
+from fastapi.testclient import TestClient
+
+import main
+from main import (
+    app, RATE_LIMITS, RATE_BUCKETS, DICTIONARY_CACHE, SEARCH_QUEUES, FRONTEND_URL,
+    take_rate_token, is_cached_lookup, schedule_search, run_search_worker,
+    search_deadline, create_access_token,
+)
+
+def test_token_bucket_refill():
+    """A full bucket allows a burst, then refills at the configured rate"""
+    RATE_BUCKETS.clear()
+    rate, burst = RATE_LIMITS["fuzzy"]
+    for _ in range(int(burst)):
+        assert take_rate_token("alice", "fuzzy") == 0
+    retry_after = take_rate_token("alice", "fuzzy")
+    assert 0 < retry_after <= 1 / rate
+
+    # Other users and the exact budget are unaffected
+    assert take_rate_token("bob", "fuzzy") == 0
+    assert take_rate_token("alice", "exact") == 0
+
+    # Pretend one token's worth of time has passed
+    RATE_BUCKETS[("alice", "fuzzy")]["updated"] -= 1 / rate
+    assert take_rate_token("alice", "fuzzy") == 0
+    assert take_rate_token("alice", "fuzzy") > 0
+
+def test_cached_phrase_lookup():
+    """Phrases cached under their collocation name count as exact lookups"""
+    DICTIONARY_CACHE["hot_dog"] = "a frankfurter served hot on a bun"
+    assert is_cached_lookup("hot_dog")
+    assert is_cached_lookup("Hot  Dog ")
+    assert not is_cached_lookup("hot dgo")
+
+def test_fuzzy_search_through_queue():
+    """Uncached searches go through the scheduler and come back with real suggestions"""
+    RATE_BUCKETS.clear()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    with TestClient(app) as client:
+        for word, expected in (("pyhton", "python"), ("hot dgo", "hot dog")):
+            DICTIONARY_CACHE.pop(word, None)
+            assert not is_cached_lookup(word)
+            response = client.post("/search", json={"word": word}, headers=headers)
+            assert response.status_code == 200, response.text
+            result = response.json()
+            assert expected in result["suggestions"], result
+            assert result["tiers_run"], result
+            assert not result["partial"], result
+
+def test_search_429():
+    """Over-limit searches get 429 with a Retry-After the browser is allowed to read"""
+    RATE_BUCKETS.clear()
+    headers = {
+        "Authorization": f"Bearer {create_access_token({'sub': 'admin'})}",
+        "Origin": FRONTEND_URL,
+    }
+    _, burst = RATE_LIMITS["fuzzy"]
+    with TestClient(app) as client:
+        for i in range(int(burst)):
+            response = client.post("/search", json={"word": f"zzqx{i}"}, headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.json()["tiers_run"], response.json()
+        response = client.post("/search", json={"word": "zzqxv"}, headers=headers)
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        assert "retry-after" in response.headers["access-control-expose-headers"].lower()
+
+def test_expired_search_is_shed():
+    """A job whose deadline passed while queued is dropped instead of run"""
+    calls = []
+
+    def search(word):
+        calls.append(word)
+        return {"word": word}
+
+    async def scenario():
+        app.state.search_pending = asyncio.Semaphore(0)
+        worker = asyncio.create_task(run_search_worker())
+        try:
+            assert await schedule_search("alice", search_deadline(), search, "fresh") == {"word": "fresh"}
+            assert await schedule_search("alice", time.perf_counter() - 1, search, "stale") is None
+        finally:
+            worker.cancel()
+
+    asyncio.run(scenario())
+    assert calls == ["fresh"]
+    assert not SEARCH_QUEUES
+
+def test_queue_full_spends_no_token():
+    """Requests rejected for a full queue don't also drain the rate bucket"""
+    RATE_BUCKETS.clear()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    SEARCH_QUEUES["admin"] = main.deque([None] * main.MAX_QUEUED_PER_USER)
+    try:
+        with TestClient(app) as client:
+            response = client.post("/search", json={"word": "zzqxv"}, headers=headers)
+        assert response.status_code == 429
+        assert ("admin", "fuzzy") not in RATE_BUCKETS
+    finally:
+        del SEARCH_QUEUES["admin"]
+
+if __name__ == "__main__":
+    test_token_bucket_refill()
+    test_cached_phrase_lookup()
+    test_fuzzy_search_through_queue()
+    test_search_429()
+    test_expired_search_is_shed()
+    test_queue_full_spends_no_token()
+    print("Rate limit tests passed")
@@ -0,0 +1,108 @@
+import os
+import tempfile
+
+import search_history
+from search_history import (
+    HISTORY_SIZE, SEARCH_HISTORY, CLEARED_AT, DIRTY_USERS,
+    get_user_history, record_search, clear_history, load_search_history,
+    snapshot_search_history, write_search_history, apply_merged_history, flush_search_history,
+)
+
+def reset_history():
+    SEARCH_HISTORY.clear()
+    CLEARED_AT.clear()
+    DIRTY_USERS.clear()
+
+def record_words(username, words):
+    for word in words:
+        record_search(username, {"word": word, "exact_match": True, "meaning": f"meaning of {word}"})
+
+def test_ring_buffer_overflow():
+    """Only the newest HISTORY_SIZE entries are kept, oldest first"""
+    reset_history()
+    words = [f"word{i}" for i in range(HISTORY_SIZE + 5)]
+    record_words("alice", words)
+    record_search("alice", {"word": "mispelled", "exact_match": False})
+
+    history = [entry["word"] for entry in get_user_history("alice")]
+    assert history == words[-HISTORY_SIZE:], history
+    assert DIRTY_USERS == {"alice"}
+
+def test_flush_round_trip():
+    """Two processes flushing to one file keep each other's entries"""
+    reset_history()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_history.json")
+
+        record_words("alice", ["apple", "banana"])
+        apply_merged_history(write_search_history(snapshot_search_history(), path))
+        assert snapshot_search_history() is None, "flushed users stay dirty"
+
+        # A second worker process starts empty and saves its own search
+        reset_history()
+        record_words("alice", ["cherry"])
+        record_words("bob", ["date"])
+        apply_merged_history(write_search_history(snapshot_search_history(), path))
+        assert [e["word"] for e in get_user_history("alice")] == ["apple", "banana", "cherry"]
+
+        reset_history()
+        load_search_history(path)
+        assert [e["word"] for e in get_user_history("alice")] == ["apple", "banana", "cherry"]
+        assert [e["word"] for e in get_user_history("bob")] == ["date"]
+        assert not [name for name in os.listdir(tmp) if name.endswith(".tmp")]
+
+def test_clear_survives_merge():
+    """DELETE /history is not undone by entries another process saved earlier"""
+    reset_history()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_history.json")
+        record_words("alice", ["apple"])
+        write_search_history(snapshot_search_history(), path)
+
+        clear_history("alice")
+        record_words("alice", ["banana"])
+        write_search_history(snapshot_search_history(), path)
+
+        reset_history()
+        load_search_history(path)
+        assert [e["word"] for e in get_user_history("alice")] == ["banana"]
+
+def test_shutdown_flush_corrupt_file():
+    """A corrupt history file is reported, not raised out of the shutdown hook"""
+    reset_history()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_history.json")
+        with open(path, "w") as f:
+            f.write("{not json")
+        saved_path, search_history.HISTORY_FILE = search_history.HISTORY_FILE, path
+        try:
+            record_words("alice", ["apple"])
+            flush_search_history()
+        finally:
+            search_history.HISTORY_FILE = saved_path
+        assert DIRTY_USERS == {"alice"}, "unsaved users are retried on the next flush"
+
+def test_prefetch_phrase_keys():
+    """Phrase suggestions are prefetched under the collocation name they are cached as"""
+    from main import DICTIONARY_CACHE, predict_next_lookups, prefetch_definitions
+    reset_history()
+    result = {"exact_match": False, "suggestions": ["computer program"]}
+    DICTIONARY_CACHE.pop("computer_program", None)
+    assert predict_next_lookups("alice", result) == ["computer_program"]
+    prefetch_definitions(["computer_program"])
+    assert "computer_program" in DICTIONARY_CACHE
+    assert predict_next_lookups("alice", result) == []
+
+def test_history_file_default():
+    """The default file lives next to the backend, not in the working directory"""
+    if "HISTORY_FILE" not in os.environ:
+        assert os.path.dirname(search_history.HISTORY_FILE) == os.path.dirname(os.path.abspath(search_history.__file__))
+
+if __name__ == "__main__":
+    test_ring_buffer_overflow()
+    test_flush_round_trip()
+    test_clear_survives_merge()
+    test_shutdown_flush_corrupt_file()
+    test_prefetch_phrase_keys()
+    test_history_file_default()
+    print("Search history tests passed")
@@ -81,11 +81,11 @@ export const AuthProvider = ({ children }) => {
   };
 
   // Updated search function with better error handling
-  const searchWord = async (word) => {
+  const searchWord = async (word, profile) => {
     try {
       const response = await axios.post(
         `${API_URL}/search`,
-        { word },
+        profile ? { word, profile } : { word },
         {
           withCredentials: true,
           headers: {
@@ -65,16 +65,51 @@ const Dictionary = () => {
     fetchDictionaryWords();
   }, []);
 
-  // Load recent searches from localStorage
+  // Load recent searches from the server, falling back to localStorage
   useEffect(() => {
-    const savedSearches = localStorage.getItem("recentSearches");
-    if (savedSearches) {
+    const loadLocalSearches = () => {
+      const savedSearches = localStorage.getItem("recentSearches");
+      if (savedSearches) {
+        try {
+          setRecentSearches(JSON.parse(savedSearches));
+        } catch (e) {
+          console.error("Error parsing recent searches:", e);
+        }
+      }
+    };
+
+    const fetchHistory = async () => {
       try {
-        setRecentSearches(JSON.parse(savedSearches));
-      } catch (e) {
-        console.error("Error parsing recent searches:", e);
+        const response = await axios.get("http://localhost:8000/history", {
+          withCredentials: true,
+        });
+        const history = response.data.history || [];
+        if (history.length === 0) {
+          loadLocalSearches();
+          return;
+        }
+
+        // Server history is newest first and may repeat words
+        const seen = new Set();
+        const searches = [];
+        for (const entry of history) {
+          if (seen.has(entry.word)) continue;
+          seen.add(entry.word);
+          searches.push({
+            word: entry.word,
+            timestamp: entry.timestamp,
+            isExactMatch: true,
+            meaning: entry.meaning,
+          });
+        }
+        setRecentSearches(searches.slice(0, 5));
+      } catch (err) {
+        console.error("Failed to load search history:", err);
+        loadLocalSearches();
       }
-    }
+    };
+
+    fetchHistory();
   }, []);
 
   // Save recent searches to localStorage
@@ -119,9 +154,9 @@ const Dictionary = () => {
         // If we have enough client-side suggestions, use them
         setSuggestions(clientSideSuggestions);
       } else {
-        // Otherwise, fall back to backend API for fuzzy search
+        // Otherwise, fall back to backend API using the cheap autocomplete profile
         try {
-          const data = await searchWord(term);
+          const data = await searchWord(term, "fast");
 
           // If exact match, no need for suggestions
           if (data.exact_match) {
@@ -196,7 +231,16 @@ const Dictionary = () => {
         saveSearch(data.word, true, data.meaning);
       }
     } catch (err) {
-      setError("Error searching for word. Please try again.");
+      if (err.response?.status === 429) {
+        const retryAfter = err.response.headers?.["retry-after"];
+        setError(
+          `Too many searches. Please wait ${retryAfter || "a few"} second${
+            retryAfter === "1" ? "" : "s"
+          } and try again.`
+        );
+      } else {
+        setError("Error searching for word. Please try again.");
+      }
       console.error("Search error:", err);
     } finally {
       setIsLoading(false);